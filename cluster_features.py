@@ -30,7 +30,9 @@ class ClusterFeatureAdder(BaseEstimator, TransformerMixin):
             reproducible clustering.
 
     Attributes:
-        kmeans_: Fitted KMeans instance after calling `fit`.
+        kmeans_: Fitted KMeans instance after calling `fit`. Cluster labels
+            are computed from its cached centroids rather than through
+            `KMeans.predict`.
     """
 
     def __init__(self, n_clusters: int = 5, random_state: int = 42) -> None:
@@ -54,8 +56,20 @@ class ClusterFeatureAdder(BaseEstimator, TransformerMixin):
             n_init="auto",
         )
         self.kmeans_.fit(X)
+        self._cache_centers()
         return self
 
+    def __setstate__(self, state):
+        # Models pickled before the centroid cache existed rebuild it on load
+        super().__setstate__(state)
+        if self.kmeans_ is not None and "_C" not in state:
+            self._cache_centers()
+
+    def _cache_centers(self) -> None:
+        """Cache float32 centroids and their squared norms for `transform`."""
+        self._C = self.kmeans_.cluster_centers_.astype(np.float32)
+        self._c_norm = (self._C ** 2).sum(axis=1)
+
     def transform(self, X):
         """Append k-means cluster labels as an extra feature column.
 
@@ -63,12 +77,72 @@ class ClusterFeatureAdder(BaseEstimator, TransformerMixin):
             X: Array-like of shape (n_samples, n_features).
 
         Returns:
-            np.ndarray: Array of shape (n_samples, n_features + 1) where the
-            last column contains the cluster labels as floats.
+            np.ndarray: float32 array of shape (n_samples, n_features + 1)
+            where the last column contains the cluster labels.
         """
-        if self.kmeans_ is None:
-            raise RuntimeError("ClusterFeatureAdder must be fitted before calling transform().")
-
-        clusters = self.kmeans_.predict(X)
-        clusters = clusters.reshape(-1, 1).astype("float32")
-        return np.hstack([X, clusters])
+        # The centroid cache only exists once fitted, so no separate check
+        try:
+            centers, center_norms = self._C, self._c_norm
+        except AttributeError:
+            raise RuntimeError(
+                "ClusterFeatureAdder must be fitted before calling transform()."
+            ) from None
+
+        X = np.asarray(X)
+        out = np.empty((X.shape[0], X.shape[1] + 1), dtype=np.float32)
+        np.copyto(out[:, :-1], X, casting="same_kind")
+
+        # argmin ||x - c||^2 == argmin ||c||^2 - 2 x.c, one matrix product
+        distances = center_norms - 2 * (out[:, :-1] @ centers.T)
+        out[:, -1] = distances.argmin(axis=1)
+        return out
+
+
+# Version of the ONNX converter below. Compiled models cached on disk record
+# it, so bump it whenever the converter's output changes.
+ONNX_CONVERTER_VERSION = 1
+
+# Optional ONNX export support so pipelines using this transformer can be
+# compiled with skl2onnx. Without skl2onnx installed nothing is registered.
+try:
+    from onnx import TensorProto
+    from skl2onnx import update_registered_converter
+    from skl2onnx.algebra.onnx_operator import OnnxSubEstimator
+    from skl2onnx.algebra.onnx_ops import OnnxCast, OnnxConcat, OnnxReshape
+    from skl2onnx.common.data_types import FloatTensorType
+except ImportError:
+    pass
+else:
+    def _cluster_feature_adder_shape(operator) -> None:
+        """Declare the output as the input columns plus one label column."""
+        n_features = operator.inputs[0].get_second_dimension()
+        n_out = n_features + 1 if n_features else None
+        operator.outputs[0].type = FloatTensorType([None, n_out])
+
+    def _cluster_feature_adder_converter(scope, operator, container) -> None:
+        """Emit KMeans labels cast to float and concatenated onto the input."""
+        op_version = container.target_opset
+        X = operator.inputs[0]
+        kmeans = OnnxSubEstimator(
+            operator.raw_operator.kmeans_, X, op_version=op_version
+        )
+        labels = OnnxReshape(
+            OnnxCast(kmeans[0], to=TensorProto.FLOAT, op_version=op_version),
+            np.array([-1, 1], dtype=np.int64),
+            op_version=op_version,
+        )
+        output = OnnxConcat(
+            X,
+            labels,
+            axis=1,
+            op_version=op_version,
+            output_names=operator.outputs[:1],
+        )
+        output.add_to(scope, container)
+
+    update_registered_converter(
+        ClusterFeatureAdder,
+        "ClusterFeatureAdder",
+        _cluster_feature_adder_shape,
+        _cluster_feature_adder_converter,
+    )
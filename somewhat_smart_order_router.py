@@ -7,35 +7,718 @@ This module loads per-exchange regression models and generates the
 # Standard library
 from __future__ import annotations
 
-from typing import Dict, Optional
+import hashlib
+import json
+import math
+import contextlib
+import os
+import queue
+import tempfile
+import warnings
+import threading
+import weakref
+from concurrent.futures import Future, TimeoutError, as_completed
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Sequence
 
 
 # Third-party
-import pandas as pd
 import numpy as np
+import sklearn
 from joblib import load
-from sklearn.base import RegressorMixin
+from sklearn.base import RegressorMixin, is_regressor
+from sklearn.linear_model._base import LinearModel
+from sklearn.pipeline import Pipeline
+
+# Optional compiled backend: when onnxruntime and skl2onnx are installed the
+# models are converted once at load time and run through ONNX Runtime.
+try:
+    import onnx
+    import onnx.compose
+    import onnxruntime as ort
+    import skl2onnx
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    from google.protobuf.message import DecodeError
+except ImportError:
+    ort = None
+
+# Local library
+from cluster_features import ONNX_CONVERTER_VERSION
 
 
 MODELS_PATH = "per_exchange_price_improvement_models.joblib"
 
+# Fused ONNX router built from MODELS_PATH, reused across process starts
+ROUTER_ONNX_PATH = "router.onnx"
+
+# Order side encoding, +1 for buy and -1 for sell (either case)
+_SIDE = {"B": 1, "b": 1, "S": -1, "s": -1}
+
+# Number of distinct orders whose routing decision is memoized
+PREDICTION_CACHE_SIZE = 65536
+
+# Deadline for the per-exchange models on each call, in milliseconds. When set,
+# the models run in a thread pool and any model that has not answered in time,
+# or is still stuck on an earlier order that missed its deadline, is ignored
+# for that order. Such partial answers are returned but never cached. None
+# waits for every model sequentially.
+DEADLINE_MS: Optional[float] = None
+
 ModelsByExchange = Dict[str, RegressorMixin]
 _models: Optional[ModelsByExchange] = None
 
+# File `_models` was loaded from, None if they were set some other way
+_models_path: Optional[str] = None
+
+# Routes one normalized order, see `_make_router`
+Router = Callable[[int, int, int, int, int, int, int], tuple[str, float]]
+
+# Routes a (n_orders, n_features) float32 batch, see `_make_router`
+BatchRouter = Callable[[np.ndarray], list[tuple[str, float]]]
+
+# Predictions for every exchange, shape (n_exchanges, n_orders), and whether
+# every exchange contributed to them
+PredictAll = Callable[[np.ndarray], tuple[np.ndarray, bool]]
+
+# Index and score of the best row of W @ x + B, see `_score_linear_numpy`
+LinearScorer = Callable[[np.ndarray, np.ndarray, np.ndarray], tuple[int, float]]
+
+# Feature order used when training the per-exchange models
+_FEATURE_COLUMNS = [
+    "side",
+    "order_qty",
+    "limit_price",
+    "bid_price",
+    "ask_price",
+    "bid_size",
+    "ask_size",
+]
+
+
+def _stack_linear_models(
+        models: ModelsByExchange,
+) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    """Merge linear models into one weight matrix so all exchanges score at once.
+
+    Args:
+        models: Dictionary mapping exchange codes to trained regressors.
+
+    Only regressors whose predict is exactly ``X @ coef_ + intercept_`` are
+    stacked. GLMs such as PoissonRegressor also have ``coef_`` but apply a
+    link function, so they keep their own predict.
+
+    Returns:
+        The stacked coefficients and intercepts, or None if any model is not
+        a plain linear regressor.
+    """
+    if not all(
+        isinstance(m, LinearModel) and is_regressor(m) for m in models.values()
+    ):
+        return None
+
+    W = np.vstack([np.ravel(m.coef_) for m in models.values()]).astype(np.float32)
+    B = np.array(
+        [float(np.ravel(m.intercept_)[0]) for m in models.values()],
+        dtype=np.float32,
+    )
+    return W, B
+
+
+def _strip_feature_names(model: RegressorMixin) -> None:
+    """Drop the fitted column names so predict accepts a bare ndarray.
+
+    The models were trained on a DataFrame, which makes sklearn warn about and
+    check feature names on every predict. The column order is fixed by
+    ``_FEATURE_COLUMNS``, so the names carry no information at inference time.
+
+    Args:
+        model: Trained regressor or pipeline, modified in place.
+    """
+    first = model.steps[0][1] if isinstance(model, Pipeline) else model
+    vars(first).pop("feature_names_in_", None)
+
+
+def _score_linear_numpy(
+        W: np.ndarray,
+        B: np.ndarray,
+        x: np.ndarray,
+) -> tuple[int, float]:
+    """Return the index and value of the best row of ``W @ x + B``.
+
+    NaN scores never win. The index is -1 when no row scores above -inf.
+    """
+    scores = np.nan_to_num(
+        W @ x + B, copy=False, nan=-np.inf, posinf=np.inf, neginf=-np.inf
+    )
+    best = int(scores.argmax())
+    if scores[best] == -np.inf:
+        return -1, -np.inf
+    return best, float(scores[best])
+
+
+@lru_cache(maxsize=None)
+def _jit_score_linear() -> Optional[LinearScorer]:
+    """Compile a loop version of `_score_linear_numpy` with numba.
+
+    numba is optional and slow to import, so it is only imported the first
+    time a router for stacked linear models is built.
+
+    Returns:
+        The compiled kernel, or None when numba is not installed.
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+
+    # No fastmath: it assumes no NaN/inf, which breaks the comparisons below
+    @njit(cache=True)
+    def score_linear(W, B, x):
+        best_score = -np.inf
+        best = -1
+        for i in range(W.shape[0]):
+            score = B[i]
+            for j in range(W.shape[1]):
+                score += W[i, j] * x[j]
+            if score > best_score:
+                best_score = score
+                best = i
+        return best, best_score
+
+    return score_linear
+
+
+def _convert_models(models: ModelsByExchange) -> Dict[str, "onnx.ModelProto"]:
+    """Convert each model to ONNX when the compiled backend is installed.
+
+    Models that cannot be converted are left out, with a RuntimeWarning naming
+    the exchange, and keep using their sklearn ``predict``.
+
+    Args:
+        models: Dictionary mapping exchange codes to trained regressors.
+
+    Returns:
+        A dictionary mapping exchange codes to ONNX models, for the models
+        that could be converted. All read a float32 tensor named "input".
+    """
+    onnx_models: Dict[str, "onnx.ModelProto"] = {}
+    if ort is None:
+        return onnx_models
+
+    initial_types = [("input", FloatTensorType([None, len(_FEATURE_COLUMNS)]))]
+    for exchange, model in models.items():
+        try:
+            onnx_models[exchange] = convert_sklearn(model, initial_types=initial_types)
+        except Exception as exc:
+            # skl2onnx reports unsupported models with many exception types
+            # (MissingConverter, RuntimeError, ValueError, ...)
+            warnings.warn(
+                f"Model for exchange {exchange!r} could not be converted to "
+                f"ONNX ({type(exc).__name__}); falling back to sklearn predict.",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+    return onnx_models
+
+
+def _make_session(onnx_model: "onnx.ModelProto") -> "ort.InferenceSession":
+    """Create a CPU ONNX Runtime session for an in-memory model."""
+    return ort.InferenceSession(
+        onnx_model.SerializeToString(),
+        providers=["CPUExecutionProvider"],
+    )
+
+
+def _fuse_models(onnx_models: list["onnx.ModelProto"]) -> "onnx.ModelProto":
+    """Merge per-exchange ONNX models into one graph that also picks the best.
+
+    The models share the "input" tensor; their outputs are concatenated into
+    "scores" of shape (n_orders, n_exchanges) and reduced by an ArgMax node
+    into "best", so a single session run routes a whole batch.
+
+    Args:
+        onnx_models: Converted models, in exchange order.
+
+    Returns:
+        The fused ONNX model.
+    """
+    nodes = []
+    initializers = []
+    outputs = []
+    opsets: Dict[str, int] = {}
+    for i, onnx_model in enumerate(onnx_models):
+        prefixed = onnx.compose.add_prefix(
+            onnx_model, prefix=f"exchange{i}_", rename_inputs=False
+        )
+        nodes.extend(prefixed.graph.node)
+        initializers.extend(prefixed.graph.initializer)
+        outputs.append(prefixed.graph.output[0].name)
+        for opset in prefixed.opset_import:
+            opsets[opset.domain] = max(opsets.get(opset.domain, 0), opset.version)
+
+    nodes.append(onnx.helper.make_node("Concat", outputs, ["scores"], axis=1))
+    nodes.append(
+        onnx.helper.make_node("ArgMax", ["scores"], ["best"], axis=1, keepdims=0)
+    )
+    graph = onnx.helper.make_graph(
+        nodes,
+        "order_router",
+        [onnx_models[0].graph.input[0]],
+        [
+            onnx.helper.make_tensor_value_info(
+                "scores", onnx.TensorProto.FLOAT, [None, len(onnx_models)]
+            ),
+            onnx.helper.make_tensor_value_info(
+                "best", onnx.TensorProto.INT64, [None]
+            ),
+        ],
+        initializer=initializers,
+    )
+    return onnx.helper.make_model(
+        graph,
+        opset_imports=[
+            onnx.helper.make_opsetid(domain, version)
+            for domain, version in opsets.items()
+        ],
+        ir_version=onnx_models[0].ir_version,
+    )
+
+
+def _file_sha256(path: str) -> str:
+    """Return the SHA-256 hex digest of a file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fused_model_props(exchanges: list[str], models_sha256: str) -> Dict[str, str]:
+    """Metadata identifying everything a fused router was compiled from.
+
+    Args:
+        exchanges: Exchange codes, in the order the router scores them.
+        models_sha256: Digest of the model bundle.
+    """
+    return {
+        "models_sha256": models_sha256,
+        "exchanges": json.dumps(exchanges),
+        "sklearn": sklearn.__version__,
+        "skl2onnx": skl2onnx.__version__,
+        "onnx": onnx.__version__,
+        "cluster_feature_adder_converter": str(ONNX_CONVERTER_VERSION),
+    }
+
+
+def _load_fused_session(
+        exchanges: list[str],
+        models_sha256: str,
+) -> Optional["ort.InferenceSession"]:
+    """Open the fused router in ROUTER_ONNX_PATH if it matches the models.
+
+    Args:
+        exchanges: Exchange codes, in the order the router scores them.
+        models_sha256: Digest of the model bundle the router must come from.
+
+    Returns:
+        A session for the fused router, or None if the file is missing,
+        unreadable, built from different models or tool versions, or cannot
+        be loaded by ONNX Runtime.
+    """
+    if not os.path.exists(ROUTER_ONNX_PATH):
+        return None
+    try:
+        fused_model = onnx.load(ROUTER_ONNX_PATH)
+    except (OSError, DecodeError):
+        return None
+
+    props = {prop.key: prop.value for prop in fused_model.metadata_props}
+    expected = _fused_model_props(exchanges, models_sha256)
+    if any(props.get(key) != value for key, value in expected.items()):
+        return None
+    try:
+        return _make_session(fused_model)
+    except Exception:
+        # ONNX Runtime raises its own exception types for invalid graphs
+        return None
+
+
+def _save_fused_model(
+        fused_model: "onnx.ModelProto",
+        exchanges: list[str],
+        models_sha256: str,
+) -> None:
+    """Write the fused router to ROUTER_ONNX_PATH, tagged with its source.
+
+    The file is written under a unique temporary name in the same directory
+    and then renamed, so processes starting at the same time never read or
+    clobber each other's partial output.
+
+    Args:
+        fused_model: Output of `_fuse_models`, tagged in place.
+        exchanges: Exchange codes, in the order the router scores them.
+        models_sha256: Digest of the model bundle it was built from.
+    """
+    onnx.helper.set_model_props(
+        fused_model, _fused_model_props(exchanges, models_sha256)
+    )
+    directory, name = os.path.split(os.path.abspath(ROUTER_ONNX_PATH))
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(fused_model.SerializeToString())
+        os.replace(tmp_path, ROUTER_ONNX_PATH)
+    except OSError as exc:
+        if tmp_path is not None:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+        warnings.warn(
+            f"Could not save the fused router to {ROUTER_ONNX_PATH!r} ({exc}); "
+            "it will be rebuilt on the next start.",
+            RuntimeWarning,
+            stacklevel=2,
+        )
+
+
+def _make_predictor(
+        model: RegressorMixin,
+        session: Optional["ort.InferenceSession"],
+) -> Callable[[np.ndarray], np.ndarray]:
+    """Return a function mapping a float32 feature array to 1-d predictions.
+
+    Args:
+        model: Trained regressor, used when no compiled session exists.
+        session: ONNX Runtime session compiled from ``model``, if any.
+    """
+    if session is None:
+        return model.predict
+
+    def predict(X: np.ndarray) -> np.ndarray:
+        return session.run(None, {"input": X})[0].ravel()
+
+    return predict
+
+
+class _DeadlineMissed(Exception):
+    """Raised by a router whose answer left out models that missed the deadline.
+
+    Carries the routes anyway so callers can return them, while keeping the
+    partial answer out of the prediction cache (lru_cache skips exceptions).
+    """
+
+    def __init__(self, routes: list[tuple[str, float]]) -> None:
+        super().__init__("Some exchange models missed the deadline.")
+        self.routes = routes
+
+
+def _make_deadline_predict_all(
+        predictors: list[Callable[[np.ndarray], np.ndarray]],
+        timeout: float,
+) -> PredictAll:
+    """Run the predictors in parallel and give up on those past the deadline.
+
+    A predictor still running an order whose deadline has already passed is
+    skipped instead of queued behind it, so one hung model cannot make every
+    following order miss the deadline. Concurrent calls within their own
+    deadline run side by side and never skip each other's predictors.
+
+    The predictors run on daemon threads, so a hung model cannot keep the
+    interpreter from exiting, and the threads stop once the returned function
+    is garbage collected.
+
+    Args:
+        predictors: One prediction function per exchange.
+        timeout: Seconds to wait for the predictors on each call.
+
+    Returns:
+        A function returning predictions of shape (n_exchanges, n_orders),
+        where skipped exchanges and those that missed the deadline score
+        -inf, and whether every exchange answered in time.
+    """
+    tasks: queue.SimpleQueue = queue.SimpleQueue()
+
+    def work() -> None:
+        while (task := tasks.get()) is not None:
+            future, predict, X = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(predict(X))
+            except BaseException as exc:
+                future.set_exception(exc)
+
+    # Abandoned calls hold at most one thread per predictor; the rest is
+    # ThreadPoolExecutor's default size, shared by concurrent callers
+    n_workers = len(predictors) + min(32, (os.cpu_count() or 1) + 4)
+    for k in range(n_workers):
+        threading.Thread(target=work, name=f"order-router-{k}", daemon=True).start()
+
+    # Calls abandoned on a missed deadline, which may still be running
+    stragglers: list[Optional[Future]] = [None] * len(predictors)
+
+    def predict_all(X: np.ndarray) -> tuple[np.ndarray, bool]:
+        predictions = np.full((len(predictors), X.shape[0]), -np.inf)
+        futures: Dict[Future, int] = {}
+        for i, predict in enumerate(predictors):
+            straggler = stragglers[i]
+            if straggler is not None and not straggler.done():
+                continue
+            future: Future = Future()
+            tasks.put((future, predict, X))
+            futures[future] = i
+
+        complete = len(futures) == len(predictors)
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                predictions[futures[future]] = future.result()
+        except TimeoutError:
+            complete = False
+            for future, i in futures.items():
+                # Queued calls are cancelled; running ones become stragglers
+                if not future.cancel() and not future.done():
+                    stragglers[i] = future
+        return predictions, complete
+
+    def stop_workers() -> None:
+        for _ in range(n_workers):
+            tasks.put(None)
+
+    weakref.finalize(predict_all, stop_workers)
+    return predict_all
+
 
 def _load_models() -> Dict[str, RegressorMixin]:
     """Load and cache the per-exchange models from disk.
 
+    Plain numpy arrays in the bundle are memory-mapped read-only instead of
+    copied. For the bundled pipelines that only covers the StandardScaler
+    statistics: random-forest node arrays are rebuilt into sklearn's Cython
+    Tree objects on unpickle, so tree models still load fully into memory.
+
     Returns:
         A dictionary mapping exchange codes to trained regressors
     """
-    global _models
+    global _models, _models_path
 
     if _models is None:
-        _models = load(MODELS_PATH)
+        _models = load(MODELS_PATH, mmap_mode="r")
+        _models_path = MODELS_PATH
+        for model in _models.values():
+            _strip_feature_names(model)
     return _models
 
 
+def _make_router(
+        models: ModelsByExchange,
+        models_path: Optional[str] = None,
+) -> tuple[Router, BatchRouter]:
+    """Build the scoring functions for a fixed set of models.
+
+    Everything derived from the models (stacked weights, compiled sessions,
+    exchange names) is captured in the closures, so routing an order does not
+    touch module state. Each order gets its own feature row, so the routers
+    are safe to call from several threads.
+
+    Args:
+        models: Dictionary mapping exchange codes to trained regressors.
+        models_path: File ``models`` was loaded from. When given, the fused
+            ONNX router is read from and saved to ROUTER_ONNX_PATH, keyed on
+            the file's digest, instead of being converted on every start.
+
+    Returns:
+        A function taking the normalized fields of one order, and a function
+        taking a (n_orders, n_features) float32 array. Both return the best
+        exchange and its predicted price improvement for each order.
+
+    Raises:
+        RuntimeError: If no models were loaded.
+    """
+    if not models:
+        raise RuntimeError("No models were loaded.")
+
+    exchanges = list(models.keys())
+
+    # Predictions for every exchange, shape (n_exchanges, n_orders)
+    stacked = _stack_linear_models(models)
+    fused: Optional["ort.InferenceSession"] = None
+    if stacked is not None:
+        W, B = stacked
+
+        def predict_all(X: np.ndarray) -> tuple[np.ndarray, bool]:
+            return W @ X.T + B[:, None], True
+    else:
+        # Every model compiled: one fused ONNX run scores and picks the best
+        can_fuse = ort is not None and DEADLINE_MS is None and len(exchanges) > 1
+        models_sha256 = None
+        if can_fuse and models_path is not None:
+            models_sha256 = _file_sha256(models_path)
+            fused = _load_fused_session(exchanges, models_sha256)
+        if fused is None:
+            onnx_models = _convert_models(models)
+            if can_fuse and len(onnx_models) == len(exchanges):
+                fused_model = _fuse_models([onnx_models[e] for e in exchanges])
+                if models_sha256 is not None:
+                    _save_fused_model(fused_model, exchanges, models_sha256)
+                fused = _make_session(fused_model)
+
+    if stacked is None and fused is None:
+        predictors = [
+            _make_predictor(
+                model,
+                _make_session(onnx_models[exchange]) if exchange in onnx_models else None,
+            )
+            for exchange, model in models.items()
+        ]
+
+        if DEADLINE_MS is None:
+
+            def predict_all(X: np.ndarray) -> tuple[np.ndarray, bool]:
+                predictions = np.empty((len(predictors), X.shape[0]))
+                for i, predict in enumerate(predictors):
+                    predictions[i] = predict(X)
+                return predictions, True
+        else:
+            predict_all = _make_deadline_predict_all(predictors, DEADLINE_MS / 1000)
+
+    if fused is not None:
+
+        def select_best(X: np.ndarray) -> tuple[np.ndarray, np.ndarray, bool]:
+            scores, best = fused.run(None, {"input": X})
+            if np.isnan(scores).any():
+                # ArgMax may have picked a NaN; rank NaN lowest as elsewhere
+                scores = np.nan_to_num(
+                    scores, copy=False, nan=-np.inf, posinf=np.inf, neginf=-np.inf
+                )
+                best = scores.argmax(axis=1)
+            return best, scores[np.arange(X.shape[0]), best], True
+    else:
+
+        def select_best(X: np.ndarray) -> tuple[np.ndarray, np.ndarray, bool]:
+            predictions, complete = predict_all(X)
+            # NaN predictions never win, as with a strict > comparison
+            predictions = np.nan_to_num(
+                predictions, copy=False, nan=-np.inf, posinf=np.inf, neginf=-np.inf
+            )
+            best = predictions.argmax(axis=0)
+            return best, predictions[best, np.arange(X.shape[0])], complete
+
+    def route_batch(X: np.ndarray) -> list[tuple[str, float]]:
+        best, best_predictions, complete = select_best(X)
+
+        # At least one model should exist and select one exchange
+        if not np.isfinite(best_predictions).all():
+            raise RuntimeError("No valid prediction could be made.")
+
+        routes = [
+            (exchanges[k], p)
+            for k, p in zip(best.tolist(), best_predictions.tolist())
+        ]
+        if not complete:
+            raise _DeadlineMissed(routes)
+        return routes
+
+    def make_row(
+            side_num:           int,
+            quantity:           int,
+            limit_price_cents:  int,
+            bid_cents:          int,
+            ask_cents:          int,
+            bid_size:           int,
+            ask_size:           int,
+    ) -> np.ndarray:
+        return np.array(
+            [[
+                side_num,
+                quantity,
+                limit_price_cents / 100,
+                bid_cents / 100,
+                ask_cents / 100,
+                bid_size,
+                ask_size,
+            ]],
+            dtype=np.float32,
+        )
+
+    # Single exchange: nothing to compare, just report its prediction
+    if len(exchanges) == 1:
+        only_exchange = exchanges[0]
+
+        def route_single(*order: int) -> tuple[str, float]:
+            # A missed deadline scores -inf, so it is rejected below
+            prediction = float(predict_all(make_row(*order))[0][0, 0])
+            if not np.isfinite(prediction):
+                raise RuntimeError("No valid prediction could be made.")
+            return only_exchange, prediction
+
+        return route_single, route_batch
+
+    # Linear models: one fused kernel scores every exchange
+    if stacked is not None:
+        score_linear = _jit_score_linear() or _score_linear_numpy
+
+        def route_linear(*order: int) -> tuple[str, float]:
+            best, prediction = score_linear(W, B, make_row(*order)[0])
+            if best < 0 or not np.isfinite(prediction):
+                raise RuntimeError("No valid prediction could be made.")
+            return exchanges[best], float(prediction)
+
+        return route_linear, route_batch
+
+    def route(*order: int) -> tuple[str, float]:
+        return route_batch(make_row(*order))[0]
+
+    return route, route_batch
+
+
+def _build_router() -> Router:
+    """Load the models and bind the routers used by the public functions.
+
+    Single-order results are memoized on the hashable, cent-quantized order
+    fields, so repeated orders skip model evaluation entirely.
+
+    Returns:
+        The newly bound, cached single-order router.
+    """
+    global _best, _route_batch
+
+    models = _load_models()
+    route, _route_batch = _make_router(models, _models_path)
+    _best = lru_cache(maxsize=PREDICTION_CACHE_SIZE)(route)
+    return _best
+
+
+def _load_router(*order: int) -> tuple[str, float]:
+    """Build the routers on first use, then route the order."""
+    return _build_router()(*order)
+
+
+def _load_batch_router(X: np.ndarray) -> list[tuple[str, float]]:
+    """Build the routers on first use, then route the batch."""
+    _build_router()
+    return _route_batch(X)
+
+
+# Rebound to the real routers by the first order or by `warmup`
+_best: Router = _load_router
+_route_batch: BatchRouter = _load_batch_router
+
+
+def warmup() -> None:
+    """Load the models and run one dummy order through the scoring path.
+
+    Meant to be called once at application startup so the first real order
+    does not pay for deserialization, model compilation and first-call
+    allocations. The dummy order bypasses the prediction cache.
+    """
+    router = _build_router() if _best is _load_router else _best
+    try:
+        router.__wrapped__(1, 100, 18000, 17990, 18010, 500, 600)
+    except _DeadlineMissed:
+        pass
+
+
 def best_price_improvement(
         symbol:         str,
         side:           str,
@@ -65,44 +748,76 @@ def best_price_improvement(
         price improvement for this order.
 
     Raises:
+        ValueError: If a price is NaN or infinite.
         RuntimeError: If no models are loaded from disk.
     """
 
     #erasing symbol as it it not necessary
     del symbol
 
-    models = _load_models()
-    if not models:
-        raise RuntimeError("No models were loaded.")
-
     # encode +1 for buy, -1 for sell
-    side_num = 1 if side.upper() == "B" else -1
-
-    features = pd.DataFrame(
-        {
-            "side": [side_num],
-            "order_qty": [quantity],
-            "limit_price": [limit_price],
-            "bid_price": [bid_price],
-            "ask_price": [ask_price],
-            "bid_size": [bid_size],
-            "ask_size": [ask_size],
-        },
-        dtype="float32",
-    )
+    side_num = _SIDE.get(side, -1)
 
-    best_exchange: Optional[str] = None
-    best_prediction = -np.inf
+    if not (
+        math.isfinite(limit_price)
+        and math.isfinite(bid_price)
+        and math.isfinite(ask_price)
+    ):
+        raise ValueError("limit_price, bid_price and ask_price must be finite.")
 
-    # Select the best exchange
-    for exchange, model in models.items():
-        prediction = float(model.predict(features)[0])
-        if prediction > best_prediction:
-            best_prediction = prediction
-            best_exchange = exchange
+    # Prices are quantized to integer cents so repeated quotes hit the cache
+    try:
+        return _best(
+            side_num,
+            quantity,
+            round(limit_price * 100),
+            round(bid_price * 100),
+            round(ask_price * 100),
+            bid_size,
+            ask_size,
+        )
+    except _DeadlineMissed as missed:
+        return missed.routes[0]
+
+
+def best_price_improvement_batch(
+        sides:          Sequence[str],
+        quantities:     Sequence[int],
+        limit_prices:   Sequence[float],
+        bid_prices:     Sequence[float],
+        ask_prices:     Sequence[float],
+        bid_sizes:      Sequence[int],
+        ask_sizes:      Sequence[int],
+) -> list[tuple[str, float]]:
+    """Route many orders at once with a single predict call per exchange.
+
+    Each argument holds one value per order, in the same units as
+    `best_price_improvement`. Prices are rounded to cents as for single
+    orders, so both functions agree on every order.
+
+    Returns:
+        One (exchange, predicted price improvement) pair per order, in
+        input order.
+
+    Raises:
+        ValueError: If a price is NaN or infinite.
+        RuntimeError: If no models are loaded from disk.
+    """
+    if len(sides) == 0:
+        return []
+
+    prices = np.array([limit_prices, bid_prices, ask_prices], dtype=np.float64)
+    if not np.isfinite(prices).all():
+        raise ValueError("limit_prices, bid_prices and ask_prices must be finite.")
 
-    # At least one model should exist and select one exchange
-    if best_exchange is None:
-        raise RuntimeError("No valid prediction could be made.")
+    X = np.empty((len(sides), len(_FEATURE_COLUMNS)), dtype=np.float32)
+    X[:, 0] = [_SIDE.get(side, -1) for side in sides]
+    X[:, 1] = quantities
+    X[:, 2:5] = (np.round(prices * 100) / 100).T
+    X[:, 5] = bid_sizes
+    X[:, 6] = ask_sizes
 
-    return best_exchange, float(best_prediction)
+    try:
+        return _route_batch(X)
+    except _DeadlineMissed as missed:
+        return missed.routes
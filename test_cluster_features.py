@@ -0,0 +1,74 @@
+"""Unit tests for the ClusterFeatureAdder transformer"""
+
+# Standard library
+import pickle
+
+# Third-party
+import numpy as np
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+# Local library
+from cluster_features import ClusterFeatureAdder
+
+
+def _order_features(n_orders):
+    """Unscaled order features: side, quantity, prices and sizes"""
+    rng = np.random.default_rng(0)
+    mid = rng.uniform(10, 500, n_orders)
+    return np.column_stack([
+        rng.choice([-1, 1], n_orders),
+        rng.integers(1, 5000, n_orders),
+        mid + rng.normal(0, 1, n_orders),
+        mid - 0.05,
+        mid + 0.05,
+        rng.integers(1, 5000, n_orders),
+        rng.integers(1, 5000, n_orders),
+    ]).astype(np.float32)
+
+
+@pytest.mark.parametrize("scaled", [True, False], ids=["scaled", "unscaled"])
+def test_labels_match_kmeans_predict(scaled):
+    """Test that the appended labels are the fitted KMeans' own predictions"""
+    X = _order_features(2000)
+    if scaled:
+        X = StandardScaler().fit_transform(X).astype(np.float32)
+    adder = ClusterFeatureAdder(n_clusters=5).fit(X[:1000])
+
+    labels = adder.transform(X)[:, -1]
+
+    np.testing.assert_array_equal(labels, adder.kmeans_.predict(X))
+
+
+def test_output_is_float32_with_label_column():
+    """Test the output dtype and shape, and that the input columns are kept"""
+    X = _order_features(100)
+    adder = ClusterFeatureAdder(n_clusters=3).fit(X)
+
+    out = adder.transform(X.astype(np.float64))
+
+    assert out.dtype == np.float32
+    assert out.shape == (100, X.shape[1] + 1)
+    np.testing.assert_array_equal(out[:, :-1], X)
+
+
+def test_transform_before_fit_raises():
+    """Test that an unfitted transformer raises a clear error"""
+    with pytest.raises(RuntimeError, match="must be fitted"):
+        ClusterFeatureAdder().transform(_order_features(5))
+
+
+def test_pickle_without_centroid_cache_rebuilds_it():
+    """
+    Test that a transformer pickled before the centroid cache existed
+    rebuilds it on load and labels rows as before.
+    """
+    X = _order_features(200)
+    adder = ClusterFeatureAdder(n_clusters=4).fit(X)
+    expected = adder.transform(X)
+
+    # Same state as a pickle written by the version without the cache
+    del adder._C, adder._c_norm
+    restored = pickle.loads(pickle.dumps(adder))
+
+    np.testing.assert_array_equal(restored.transform(X), expected)
@@ -1,7 +1,30 @@
 """Unit tests for the best_price_improvement order-router API"""
 
+# Standard library
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-party
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression, PoissonRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import FunctionTransformer
+
 # Local library
-from somewhat_smart_order_router import best_price_improvement
+import somewhat_smart_order_router as router
+from somewhat_smart_order_router import (
+    best_price_improvement,
+    best_price_improvement_batch,
+    warmup,
+)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warm():
+    """Load and compile the models once for the whole test session"""
+    warmup()
 
 
 def test_normal_order():
@@ -59,4 +82,363 @@ def test_corner_case_2():
 
     assert isinstance(exchange, str)
     assert len(exchange) > 0
-    assert isinstance(price_improvement, float)
\ No newline at end of file
+    assert isinstance(price_improvement, float)
+
+
+def test_batch_matches_single_orders():
+    """Test that routing a batch gives the same answer as order-by-order"""
+    orders = [
+        ("B", 100, 180.0, 179.9, 180.1, 500, 600),
+        ("S", 1, 180.0, 179.9, 180.1, 1, 1),
+        ("s", 10, 200.0, 179.9, 180.1, 1, 1),
+    ]
+
+    results = best_price_improvement_batch(*zip(*orders))
+
+    assert len(results) == len(orders)
+    for order, (exchange, price_improvement) in zip(orders, results):
+        expected_exchange, expected_improvement = best_price_improvement("AAPL", *order)
+        assert exchange == expected_exchange
+        assert abs(price_improvement - expected_improvement) < 1e-6
+
+
+def test_repeated_order_is_a_cache_hit():
+    """
+    Test that a repeated order, or one whose prices differ by less than half
+    a cent, is answered from the prediction cache.
+    """
+    order = dict(
+        symbol="AAPL",
+        side="B",
+        quantity=100,
+        limit_price=180.0,
+        bid_price=179.9,
+        ask_price=180.1,
+        bid_size=500,
+        ask_size=600,
+    )
+    first = best_price_improvement(**order)
+    hits = router._best.cache_info().hits
+
+    assert best_price_improvement(**order) == first
+    assert best_price_improvement(**{**order, "bid_price": 179.904}) == first
+    assert best_price_improvement(**{**order, "limit_price": 179.996}) == first
+    assert router._best.cache_info().hits == hits + 3
+
+
+@pytest.mark.parametrize("bad_price", [float("nan"), float("inf")])
+def test_non_finite_price_raises(bad_price):
+    """Test that a NaN or infinite price is rejected with a clear error"""
+    with pytest.raises(ValueError):
+        best_price_improvement(
+            symbol="AAPL",
+            side="B",
+            quantity=100,
+            limit_price=bad_price,
+            bid_price=179.9,
+            ask_price=180.1,
+            bid_size=500,
+            ask_size=600,
+        )
+    with pytest.raises(ValueError):
+        best_price_improvement_batch(
+            ["B"], [100], [180.0], [bad_price], [180.1], [500], [600]
+        )
+
+
+# Normalized order fields as passed to the router: side, quantity, limit, bid
+# and ask in cents, bid and ask sizes
+_ORDERS = [
+    (1, 100, 18000, 17990, 18010, 500, 600),
+    (-1, 1, 18000, 17990, 18010, 1, 1),
+    (-1, 10, 20000, 17990, 18010, 1, 1),
+]
+
+
+def _features(order):
+    """Feature row the models see for a normalized order"""
+    side_num, quantity, limit_cents, bid_cents, ask_cents, bid_size, ask_size = order
+    return np.array(
+        [[side_num, quantity, limit_cents / 100, bid_cents / 100, ask_cents / 100,
+          bid_size, ask_size]],
+        dtype=np.float32,
+    )
+
+
+def _linear_models(n_exchanges):
+    """Small per-exchange LinearRegression models on random data"""
+    rng = np.random.default_rng(0)
+    X = rng.random((50, 7)) * [2, 1000, 200, 200, 200, 1000, 1000]
+    return {
+        f"EX{i}": LinearRegression().fit(X, X @ rng.normal(size=7) + i)
+        for i in range(n_exchanges)
+    }
+
+
+def _expected_route(models, order):
+    """Best exchange and prediction from calling each model's predict"""
+    predictions = {
+        exchange: float(model.predict(_features(order))[0])
+        for exchange, model in models.items()
+    }
+    exchange = max(predictions, key=predictions.get)
+    return exchange, predictions[exchange]
+
+
+def _use_linear_kernel(monkeypatch, jit):
+    """Score stacked linear models with the numba kernel or plain numpy"""
+    if not jit:
+        monkeypatch.setattr(router, "_jit_score_linear", lambda: None)
+    elif router._jit_score_linear() is None:
+        pytest.skip("numba is not installed")
+
+
+@pytest.mark.parametrize("jit", [True, False], ids=["kernel", "numpy"])
+@pytest.mark.parametrize("n_exchanges", [1, 3])
+def test_linear_router_matches_model_predict(monkeypatch, jit, n_exchanges):
+    """Test that the stacked linear routes agree with per-model predict"""
+    _use_linear_kernel(monkeypatch, jit)
+    models = _linear_models(n_exchanges)
+    route, route_batch = router._make_router(models)
+
+    batch = route_batch(np.vstack([_features(order) for order in _ORDERS]))
+    for order, batch_result in zip(_ORDERS, batch):
+        expected_exchange, expected_prediction = _expected_route(models, order)
+        for exchange, prediction in (route(*order), batch_result):
+            assert exchange == expected_exchange
+            assert prediction == pytest.approx(expected_prediction, rel=1e-4)
+
+
+@pytest.mark.parametrize("jit", [True, False], ids=["kernel", "numpy"])
+@pytest.mark.parametrize("n_exchanges", [1, 3])
+def test_linear_router_nan_predictions(monkeypatch, jit, n_exchanges):
+    """
+    Test that NaN predictions never win, and that the router raises when no
+    exchange has a valid prediction.
+    """
+    _use_linear_kernel(monkeypatch, jit)
+    models = _linear_models(n_exchanges)
+    order = _ORDERS[0]
+
+    if n_exchanges > 1:
+        models["EX0"].coef_[:] = np.nan
+        valid = {k: m for k, m in models.items() if k != "EX0"}
+        route, route_batch = router._make_router(models)
+        assert route(*order)[0] == _expected_route(valid, order)[0]
+        assert route_batch(_features(order))[0][0] == _expected_route(valid, order)[0]
+
+    for model in models.values():
+        model.intercept_ = np.nan
+    route, route_batch = router._make_router(models)
+    with pytest.raises(RuntimeError):
+        route(*order)
+    with pytest.raises(RuntimeError):
+        route_batch(_features(order))
+
+
+def test_glm_models_are_not_stacked():
+    """Test that a GLM with coef_ is routed through its own predict"""
+    models = _linear_models(2)
+    rng = np.random.default_rng(0)
+    X = np.vstack([_features(order) for order in _ORDERS] * 10)
+    models["POISSON"] = PoissonRegressor().fit(X / 1000, rng.poisson(3, len(X)))
+    models["POISSON"].coef_ /= 1000
+
+    assert router._stack_linear_models(models) is None
+    route, _ = router._make_router(models)
+    for order in _ORDERS:
+        assert route(*order) == pytest.approx(_expected_route(models, order), rel=1e-4)
+
+
+def test_pipeline_router_nan_predictions():
+    """
+    Test the general (non-stacked) path, compiled when ONNX is available:
+    a NaN exchange never wins and all-NaN raises.
+    """
+    models = {
+        exchange: make_pipeline(model)
+        for exchange, model in _linear_models(3).items()
+    }
+    order = _ORDERS[0]
+    route, _ = router._make_router(models)
+    assert route(*order) == pytest.approx(_expected_route(models, order), rel=1e-4)
+
+    models["EX0"][-1].intercept_ = np.nan
+    valid = {k: m for k, m in models.items() if k != "EX0"}
+    route, _ = router._make_router(models)
+    assert route(*order)[0] == _expected_route(valid, order)[0]
+
+    for model in models.values():
+        model[-1].intercept_ = np.nan
+    route, _ = router._make_router(models)
+    with pytest.raises(RuntimeError):
+        route(*order)
+
+def _random_features(n_orders):
+    """Plausible feature rows around random mid prices"""
+    rng = np.random.default_rng(1)
+    mid = rng.uniform(10, 500, n_orders)
+    return np.column_stack([
+        rng.choice([-1, 1], n_orders),
+        rng.integers(1, 5000, n_orders),
+        mid + rng.normal(0, 1, n_orders),
+        mid - 0.05,
+        mid + 0.05,
+        rng.integers(1, 5000, n_orders),
+        rng.integers(1, 5000, n_orders),
+    ]).astype(np.float32)
+
+
+def test_models_predict_from_read_only_memory_map():
+    """Test that the bundled models predict with their arrays mapped read-only"""
+    models = router._load_models()
+    for model in models.values():
+        scaler = model[0]
+        assert isinstance(scaler.mean_, np.memmap)
+        assert not scaler.mean_.flags.writeable
+        assert np.isfinite(model.predict(_random_features(50))).all()
+
+
+@pytest.mark.skipif(router.ort is None, reason="onnxruntime is not installed")
+def test_onnx_router_matches_sklearn_predict():
+    """
+    Test that the bundled pipelines, including the ClusterFeatureAdder one,
+    give the same predictions through ONNX Runtime as through sklearn, both
+    per exchange and through the fused router.
+    """
+    models = router._load_models()
+    X = _random_features(500)
+    expected = np.vstack([model.predict(X) for model in models.values()])
+
+    onnx_models = router._convert_models(models)
+    assert onnx_models.keys() == models.keys()
+    for exchange, model_predictions in zip(models, expected):
+        predict = router._make_predictor(
+            models[exchange], router._make_session(onnx_models[exchange])
+        )
+        np.testing.assert_allclose(predict(X), model_predictions, atol=1e-5)
+
+    _, route_batch = router._make_router(models)
+    routes = route_batch(X)
+    exchanges = list(models)
+    assert [exchange for exchange, _ in routes] == [
+        exchanges[k] for k in expected.argmax(axis=0)
+    ]
+    np.testing.assert_allclose(
+        [prediction for _, prediction in routes], expected.max(axis=0), atol=1e-5
+    )
+
+
+@pytest.mark.skipif(router.ort is None, reason="onnxruntime is not installed")
+def test_unconvertible_model_falls_back_to_sklearn():
+    """Test that a model skl2onnx rejects warns and still routes via predict"""
+    models = {
+        exchange: make_pipeline(FunctionTransformer(np.log1p), model)
+        for exchange, model in _linear_models(3).items()
+    }
+    with pytest.warns(RuntimeWarning, match="falling back to sklearn predict"):
+        route, _ = router._make_router(models)
+
+    order = _ORDERS[0]
+    assert route(*order) == pytest.approx(_expected_route(models, order), rel=1e-4)
+
+
+@pytest.mark.skipif(router.ort is None, reason="onnxruntime is not installed")
+def test_fused_router_is_cached_and_rebuilt_when_unloadable(monkeypatch, tmp_path):
+    """
+    Test that the fused router is saved next to a models file, and that a
+    saved file ONNX Runtime cannot load is rebuilt instead of crashing.
+    """
+    onnx = pytest.importorskip("onnx")
+    router_path = tmp_path / "router.onnx"
+    models_path = tmp_path / "models.joblib"
+    models_path.write_bytes(b"stand-in model bundle")
+    monkeypatch.setattr(router, "ROUTER_ONNX_PATH", str(router_path))
+    models = {
+        exchange: make_pipeline(model)
+        for exchange, model in _linear_models(3).items()
+    }
+    order = _ORDERS[0]
+
+    route, _ = router._make_router(models, str(models_path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["models.joblib", "router.onnx"]
+    props = {p.key: p.value for p in onnx.load(router_path).metadata_props}
+    assert props["skl2onnx"] and props["onnx"] and props["cluster_feature_adder_converter"]
+    expected = route(*order)
+
+    # Decodes and matches the models, but is not a valid graph
+    fused_model = onnx.load(router_path)
+    fused_model.graph.node[-1].op_type = "NoSuchOp"
+    onnx.save(fused_model, router_path)
+
+    route, _ = router._make_router(models, str(models_path))
+    assert route(*order) == expected
+    assert onnx.load(router_path).graph.node[-1].op_type == "ArgMax"
+
+
+class _ConstantModel:
+    """Stand-in regressor that predicts a constant after an optional delay"""
+
+    def __init__(self, value, delay=0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        time.sleep(self.delay)
+        return np.full(len(X), self.value)
+
+
+def test_deadline_skips_slow_model_without_caching(monkeypatch):
+    """
+    Test that a slow model is ignored once the deadline passes, that later
+    orders are not stuck behind it, and that partial answers are not cached.
+    """
+    monkeypatch.setattr(router, "ort", None)
+    slow = _ConstantModel(5.0, delay=2.0)
+    monkeypatch.setattr(router, "DEADLINE_MS", 50)
+    monkeypatch.setattr(router, "_models", {"FAST": _ConstantModel(1.0), "SLOW": slow})
+    monkeypatch.setattr(router, "_models_path", None)
+    monkeypatch.setattr(router, "_best", router._load_router)
+    monkeypatch.setattr(router, "_route_batch", router._load_batch_router)
+
+    for quantity in (10, 20, 10):
+        exchange, price_improvement = best_price_improvement(
+            symbol="AAPL",
+            side="B",
+            quantity=quantity,
+            limit_price=180.0,
+            bid_price=179.9,
+            ask_price=180.1,
+            bid_size=500,
+            ask_size=600,
+        )
+        assert (exchange, price_improvement) == ("FAST", 1.0)
+
+    # Later orders skipped the still-running model instead of queueing on it
+    assert slow.calls == 1
+    assert router._best.cache_info().currsize == 0
+
+
+def test_deadline_concurrent_callers_all_complete(monkeypatch):
+    """
+    Test that orders routed from several threads at once each get a full
+    answer when every model answers within the deadline, and that the model
+    threads cannot block interpreter exit.
+    """
+    monkeypatch.setattr(router, "ort", None)
+    monkeypatch.setattr(router, "DEADLINE_MS", 200)
+    models = {
+        "LOW": _ConstantModel(1.0, delay=0.01),
+        "HIGH": _ConstantModel(2.0, delay=0.01),
+    }
+    _, route_batch = router._make_router(models)
+
+    # route_batch raises _DeadlineMissed if any exchange was skipped
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(route_batch, [_features(_ORDERS[0])] * 4))
+
+    assert results == [[("HIGH", 2.0)]] * 4
+    workers = [t for t in threading.enumerate() if t.name.startswith("order-router")]
+    assert workers and all(t.daemon for t in workers)